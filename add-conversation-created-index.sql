@@ -0,0 +1,15 @@
+-- Index for recent-conversation lookups (check_neon_conversations.py)
+-- WHERE created_at >= <cutoff> ORDER BY created_at DESC becomes an Index Scan
+-- instead of a Seq Scan + Sort over every conversation.
+--
+-- CONCURRENTLY can't run inside a transaction block - run this file on its own.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS conversations_created_at_idx
+  ON conversations (created_at DESC);
+
+-- Verify the plan uses the index
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT id, title, created_at
+FROM conversations
+WHERE created_at >= now() - interval '1 day'
+ORDER BY created_at DESC;
@@ -0,0 +1,22 @@
+-- Partial index for the memory export scripts
+-- (export_memories_for_llm.py, export_to_taskade.py, export_all.py)
+-- They all read WHERE status = 'ACTIVE' ORDER BY importance DESC, created_at DESC,
+-- which otherwise means a Seq Scan + Sort over every memory on each run.
+-- export_memories_to_csv.py keeps its created_at DESC order and only gets
+-- the smaller active-only COUNT/filter from it.
+--
+-- content is deliberately not INCLUDEd: btree entries are capped at ~2.7KB and
+-- long story memories would start failing inserts.
+--
+-- CONCURRENTLY can't run inside a transaction block - run this file on its own.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS memory_entries_active_export_idx
+  ON memory_entries (importance DESC, created_at DESC)
+  WHERE status = 'ACTIVE';
+
+-- Verify the plan uses the index and has no Sort node
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT content, type, importance, confidence, source, created_at
+FROM memory_entries
+WHERE status = 'ACTIVE'
+ORDER BY importance DESC, created_at DESC;
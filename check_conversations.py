@@ -6,26 +6,33 @@ if not os.path.exists(db_path):
     print(f"Database not found at {db_path}")
     exit(1)
 
-conn = sqlite3.connect(db_path)
+conn = sqlite3.connect(db_path, isolation_level=None)
 cursor = conn.cursor()
+# Read-only inspection - forbid writes and memory-map reads on large DBs
+cursor.execute("PRAGMA query_only = ON")
+cursor.execute("PRAGMA mmap_size = 268435456")
 
-# List all tables
-cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+# List all tables, flagging conversation/message ones in the query itself
+# (LIKE is already case-insensitive for ASCII in SQLite)
+cursor.execute("""
+    SELECT name, (name LIKE '%conv%' OR name LIKE '%msg%' OR name LIKE '%message%') AS is_conversation_table
+    FROM sqlite_master
+    WHERE type='table'
+""")
 tables = cursor.fetchall()
 print("Tables in Database:")
-for table in tables:
-    print(f"- {table[0]}")
+for table_name, _ in tables:
+    print(f"- {table_name}")
 
-# Try to find conversations or messages
-for table_name in [t[0] for t in tables]:
-    if 'conv' in table_name.lower() or 'msg' in table_name.lower() or 'message' in table_name.lower():
-        print(f"\nSample from {table_name}:")
-        try:
-            cursor.execute(f"SELECT * FROM {table_name} LIMIT 5")
-            rows = cursor.fetchall()
-            for row in rows:
-                print(row)
-        except Exception as e:
-            print(f"Error reading {table_name}: {e}")
+# Sample the conversation/message tables
+for table_name in [name for name, is_conversation_table in tables if is_conversation_table]:
+    print(f"\nSample from {table_name}:")
+    try:
+        cursor.execute(f'SELECT * FROM "{table_name}" LIMIT 5')
+        rows = cursor.fetchall()
+        for row in rows:
+            print(row)
+    except Exception as e:
+        print(f"Error reading {table_name}: {e}")
 
 conn.close()
@@ -0,0 +1,64 @@
+import psycopg2
+import psycopg2.pool
+import os
+import sys
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# Database connection (from your Replit secrets or .env)
+DATABASE_URL = os.getenv('DATABASE_URL')
+
+# Fallback to individual components if DATABASE_URL is not set
+DB_CONFIG = {
+    'host': os.getenv('PGHOST', 'your-host.internal'),
+    'database': os.getenv('PGDATABASE', 'your-database'),
+    'user': os.getenv('PGUSER', 'your-username'),
+    'password': os.getenv('PGPASSWORD', 'your-password'),
+    'port': int(os.getenv('PGPORT', 5432))
+}
+
+# Tag connections in pg_stat_activity and keep the socket warm while long
+# Taskade uploads hold a cursor open, so Neon doesn't drop it mid-export
+CONNECT_OPTIONS = {
+    'application_name': 'nicky-export',
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 3
+}
+
+# Upper bound on pooled connections - keep it at least as large as the
+# number of worker threads that borrow connections at the same time
+POOL_MAX_CONNECTIONS = 8
+
+_pool = None
+
+def get_pool():
+    """Create the shared connection pool on first use"""
+    global _pool
+    if _pool is None:
+        if DATABASE_URL:
+            _pool = psycopg2.pool.ThreadedConnectionPool(1, POOL_MAX_CONNECTIONS, DATABASE_URL, **CONNECT_OPTIONS)
+        elif os.getenv('PGHOST'):
+            _pool = psycopg2.pool.ThreadedConnectionPool(1, POOL_MAX_CONNECTIONS, **DB_CONFIG, **CONNECT_OPTIONS)
+        else:
+            print("❌ Error: DATABASE_URL not found in .env file")
+            sys.exit(1)
+    return _pool
+
+@contextmanager
+def get_conn():
+    """Borrow a connection from the shared pool and hand it back when done"""
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
@@ -0,0 +1,155 @@
+import csv
+import gzip
+import queue
+import sys
+import threading
+from contextlib import ExitStack
+from datetime import datetime
+from operator import itemgetter
+from tqdm import tqdm
+from db import get_conn
+from export_memories_for_llm import format_header, format_memory
+from export_to_taskade import PAYLOAD_COLUMNS, create_session, to_payload, upload_memories
+
+# Ensure UTF-8 output for Windows terminals
+if sys.platform == "win32":
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except AttributeError:
+        import codecs
+        sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# Not memories_export.csv.gz: that file is written by export_memories_to_csv.py
+# via COPY, which formats booleans and timestamps differently from csv.writer
+CSV_OUTPUT_FILE = "memories_export_all.csv.gz"
+TXT_OUTPUT_FILE = "memories_for_llm.txt.gz"
+
+# Raw columns for the CSV and TXT exports - also the CSV header. Each row
+# carries the Taskade payload columns after these.
+COLUMNS = (
+    'id', 'content', 'type', 'importance', 'confidence',
+    'support_count', 'status', 'is_protected', 'source', 'created_at'
+)
+
+# Picks format_memory's fields out of a COLUMNS row
+TXT_FIELDS = itemgetter(*(
+    COLUMNS.index(name)
+    for name in ('content', 'type', 'importance', 'confidence', 'source', 'created_at')
+))
+
+def stream_active_memories(conn):
+    """Yield (raw columns, payload columns) for each active memory from a server-side cursor"""
+    with conn.cursor(name='memexport') as cursor:
+        cursor.itersize = 1000
+        # ORDER BY is table-qualified because the payload aliases reuse some
+        # of the raw column names
+        cursor.execute(f"""
+            SELECT id, content, type, importance, confidence,
+                   support_count, status, is_protected, source, created_at,
+                   {PAYLOAD_COLUMNS}
+            FROM memory_entries
+            WHERE status = 'ACTIVE'
+            ORDER BY memory_entries.importance DESC, memory_entries.created_at DESC
+        """)
+        for row in cursor:
+            yield row[:len(COLUMNS)], row[len(COLUMNS):]
+
+def upload_from_queue(upload_queue, total, result, cancelled):
+    """Drain queued payloads into Taskade until the None sentinel arrives or the export is cancelled"""
+    def queued():
+        while not cancelled.is_set() and (payload := upload_queue.get()) is not None:
+            yield payload
+
+    try:
+        with create_session() as session:
+            result['counts'] = upload_memories(session, queued(), total)
+    except Exception as e:
+        # Hand the failure to export_all instead of dying with a bare thread traceback
+        result['error'] = e
+
+def export_all():
+    """Fetch active memories once and tee them into the CSV, TXT and Taskade exports"""
+    # Unbounded on purpose: the DB pass and both files finish at disk speed
+    # and the connection is released, while uploads drain at the rate limit
+    upload_queue = queue.Queue()
+    upload_result = {}
+    cancelled = threading.Event()
+    uploader = None
+
+    try:
+        print(f"🔌 Connecting to database...")
+        try:
+            with get_conn() as conn, conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT COUNT(*) FROM memory_entries WHERE status = 'ACTIVE'")
+                    total = cursor.fetchone()[0]
+
+                print(f"📊 Found {total} memories. Writing {CSV_OUTPUT_FILE}, {TXT_OUTPUT_FILE} and uploading to Taskade...")
+
+                uploader = threading.Thread(target=upload_from_queue, args=(upload_queue, total, upload_result, cancelled))
+                uploader.start()
+
+                with ExitStack() as stack:
+                    csv_out = stack.enter_context(gzip.open(CSV_OUTPUT_FILE, 'wt', encoding='utf-8', newline='', compresslevel=6))
+                    txt_out = stack.enter_context(gzip.open(TXT_OUTPUT_FILE, 'wt', encoding='utf-8', compresslevel=6))
+
+                    csv_writer = csv.writer(csv_out)
+                    csv_writer.writerow(COLUMNS)
+                    txt_out.write(format_header(total))
+
+                    for i, (row, payload_row) in enumerate(stream_active_memories(conn), 1):
+                        csv_writer.writerow(row)
+                        txt_out.write(format_memory(i, TXT_FIELDS(row)))
+                        upload_queue.put(to_payload(payload_row))
+
+            # The uploader's progress bar is still live, so print above it
+            tqdm.write(f"✅ Wrote {total} memories to {CSV_OUTPUT_FILE} and {TXT_OUTPUT_FILE}. Waiting for Taskade uploads...")
+        except Exception:
+            # The DB pass failed part way - drop whatever is still queued
+            # rather than spending minutes uploading a partial export
+            cancelled.set()
+            raise
+        finally:
+            # Always release the uploader; it finishes the posts in flight
+            if uploader:
+                upload_queue.put(None)
+                uploader.join()
+                if cancelled.is_set() and 'counts' in upload_result:
+                    sent, failed = upload_result['counts']
+                    print(f"⚠️  Export aborted - {sent} memories already reached Taskade, {failed} failed")
+                    if sent:
+                        print("   Remove them from Taskade before rerunning, or they will be duplicated")
+
+        if 'error' in upload_result:
+            raise upload_result['error']
+        success_count, fail_count = upload_result.get('counts', (0, 0))
+
+        # Final summary
+        print(f"\n{'='*60}")
+        print(f"✨ EXPORT COMPLETE")
+        print(f"{'='*60}")
+        print(f"📄 CSV: {CSV_OUTPUT_FILE}")
+        print(f"📄 TXT: {TXT_OUTPUT_FILE}")
+        print(f"✅ Taskade successful: {success_count}")
+        print(f"❌ Taskade failed: {fail_count}")
+        print(f"📊 Total: {total}")
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    start_time = datetime.now()
+    print(f"🧠 MEMORY EXPORT - CSV + LLM + TASKADE")
+    print(f"Started: {start_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+    export_all()
+
+    end_time = datetime.now()
+    duration = (end_time - start_time).total_seconds()
+    print(f"\n⏱️  Duration: {duration:.1f} seconds ({duration/60:.1f} minutes)")
@@ -1,8 +1,7 @@
-import psycopg2
-import os
+import gzip
 import sys
 from datetime import datetime
-from dotenv import load_dotenv
+from db import get_conn
 
 # Ensure UTF-8 output for Windows terminals
 if sys.platform == "win32":
@@ -12,62 +11,62 @@ if sys.platform == "win32":
         import codecs
         sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
 
-# Load environment variables from .env file
-load_dotenv()
+HEADER_SEP = "=" * 50 + "\n\n"
+ROW_SEP = "-" * 30 + "\n\n"
 
-# Database connection
-DATABASE_URL = os.getenv('DATABASE_URL')
+def format_header(total):
+    """Format the export header written above the memory records"""
+    return (
+        f"NICKY MEMORY EXPORT - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+        f"TOTAL MEMORIES: {total}\n"
+        f"{HEADER_SEP}"
+    )
 
-def get_connection():
-    """Establish database connection"""
-    if not DATABASE_URL:
-        print("❌ Error: DATABASE_URL not found in .env file")
-        sys.exit(1)
-    return psycopg2.connect(DATABASE_URL)
+def format_memory(i, row):
+    """Format a single memory record as one block of text"""
+    content, m_type, importance, confidence, source, created_at = row
+    
+    return (
+        f"MEMORY #{i}\n"
+        f"Type: {m_type}\n"
+        f"Importance: {importance}/100\n"
+        f"Confidence: {float(confidence or 0.0)}\n"
+        f"Source: {source}\n"
+        f"Date: {created_at}\n"
+        f"Content: {content}\n"
+        f"{ROW_SEP}"
+    )
 
 def export_to_txt():
     """Fetch memories and write to a structured TXT file for LLM consumption"""
-    output_file = "memories_for_llm.txt"
+    output_file = "memories_for_llm.txt.gz"
     
     try:
         print(f"🔌 Connecting to database...")
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Fetch all active memories
-        print(f"🔍 Fetching active memories...")
-        cursor.execute("""
-            SELECT content, type, importance, confidence, source, created_at
-            FROM memory_entries
-            WHERE status = 'ACTIVE'
-            ORDER BY importance DESC, created_at DESC
-        """)
-        
-        rows = cursor.fetchall()
-        
-        print(f"📊 Found {len(rows)} memories. Formatting for LLM in {output_file}...")
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(f"NICKY MEMORY EXPORT - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"TOTAL MEMORIES: {len(rows)}\n")
-            f.write("="*50 + "\n\n")
+        with get_conn() as conn, conn:
+            # Count first so the header can be written before rows stream in
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM memory_entries WHERE status = 'ACTIVE'")
+                total = cursor.fetchone()[0]
             
-            for i, row in enumerate(rows, 1):
-                content, m_type, importance, confidence, source, created_at = row
+            # Stream active memories through a server-side cursor
+            print(f"🔍 Fetching active memories...")
+            with conn.cursor(name='memexport') as cursor:
+                cursor.itersize = 1000
+                cursor.execute("""
+                    SELECT content, type, importance, confidence, source, created_at
+                    FROM memory_entries
+                    WHERE status = 'ACTIVE'
+                    ORDER BY importance DESC, created_at DESC
+                """)
+                
+                print(f"📊 Found {total} memories. Formatting for LLM in {output_file}...")
                 
-                f.write(f"MEMORY #{i}\n")
-                f.write(f"Type: {m_type}\n")
-                f.write(f"Importance: {importance}/100\n")
-                f.write(f"Confidence: {float(confidence) if confidence else 0.0}\n")
-                f.write(f"Source: {source}\n")
-                f.write(f"Date: {created_at}\n")
-                f.write(f"Content: {content}\n")
-                f.write("-" * 30 + "\n\n")
+                with gzip.open(output_file, 'wt', encoding='utf-8', compresslevel=6) as f:
+                    f.write(format_header(total))
+                    f.writelines(format_memory(i, row) for i, row in enumerate(cursor, 1))
             
-        print(f"✅ Successfully exported {len(rows)} memories to {output_file}")
-        
-        cursor.close()
-        conn.close()
+        print(f"✅ Successfully exported {total} memories to {output_file}")
         
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -1,9 +1,7 @@
-import psycopg2
-import csv
-import os
+import gzip
 import sys
 from datetime import datetime
-from dotenv import load_dotenv
+from db import get_conn
 
 # Ensure UTF-8 output for Windows terminals
 if sys.platform == "win32":
@@ -13,54 +11,33 @@ if sys.platform == "win32":
         import codecs
         sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
 
-# Load environment variables from .env file
-load_dotenv()
-
-# Database connection
-DATABASE_URL = os.getenv('DATABASE_URL')
-
-def get_connection():
-    """Establish database connection"""
-    if not DATABASE_URL:
-        print("❌ Error: DATABASE_URL not found in .env file")
-        sys.exit(1)
-    return psycopg2.connect(DATABASE_URL)
+# Postgres formats the CSV itself, HEADER included, so the rows never
+# have to round-trip through Python tuples
+COPY_QUERY = """
+    COPY (
+        SELECT id, content, type, importance, confidence, 
+               support_count, status, is_protected, source, created_at
+        FROM memory_entries
+        WHERE status = 'ACTIVE'
+        ORDER BY created_at DESC
+    ) TO STDOUT WITH CSV HEADER
+"""
 
 def export_to_csv():
     """Fetch memories and write to CSV"""
-    output_file = "memories_export.csv"
+    output_file = "memories_export.csv.gz"
     
     try:
         print(f"🔌 Connecting to database...")
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Fetch all active memories
-        print(f"🔍 Fetching active memories...")
-        cursor.execute("""
-            SELECT id, content, type, importance, confidence, 
-                   support_count, status, is_protected, source, created_at
-            FROM memory_entries
-            WHERE status = 'ACTIVE'
-            ORDER BY created_at DESC
-        """)
-        
-        rows = cursor.fetchall()
-        colnames = [desc[0] for desc in cursor.description]
-        
-        print(f"📊 Found {len(rows)} memories. Writing to {output_file}...")
-        
-        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.writer(csvfile)
-            # Write header
-            writer.writerow(colnames)
-            # Write data
-            writer.writerows(rows)
-            
-        print(f"✅ Successfully exported {len(rows)} memories to {output_file}")
-        
-        cursor.close()
-        conn.close()
+        with get_conn() as conn, conn:
+            # Stream active memories straight from the server through gzip into the file
+            print(f"🔍 Exporting active memories to {output_file}...")
+            with conn.cursor() as cursor:
+                with gzip.open(output_file, 'wb', compresslevel=6) as csvfile:
+                    cursor.copy_expert(COPY_QUERY, csvfile)
+                count = cursor.rowcount
+                
+        print(f"✅ Successfully exported {count} memories to {output_file}")
         
     except Exception as e:
         print(f"❌ Error: {e}")
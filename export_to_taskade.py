@@ -1,10 +1,28 @@
-import psycopg2
 import requests
-import time
+import gzip
+import io
+import itertools
 import os
+import queue
+import threading
+import time
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from tqdm import tqdm
+from urllib3.util.retry import Retry
+from db import get_conn
+
+try:
+    import orjson
+    dumps = orjson.dumps
+except ImportError:
+    # orjson is optional - stdlib json sends the same body, just slower
+    import json
+    def dumps(obj):
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
 
 # Ensure UTF-8 output for Windows terminals to avoid emoji crashes
 if sys.platform == "win32":
@@ -15,118 +33,298 @@ if sys.platform == "win32":
         import codecs
         sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
 
-# Load environment variables from .env file
-load_dotenv()
-
 # ============================================
 # CONFIGURATION  
 # ============================================
 
-# Database connection (from your Replit secrets or .env)
-DATABASE_URL = os.getenv('DATABASE_URL')
-
-# Fallback to individual components if DATABASE_URL is not set
-DB_CONFIG = {
-    'host': os.getenv('PGHOST', 'your-host.internal'),
-    'database': os.getenv('PGDATABASE', 'your-database'),
-    'user': os.getenv('PGUSER', 'your-username'),
-    'password': os.getenv('PGPASSWORD', 'your-password'),
-    'port': int(os.getenv('PGPORT', 5432))
-}
-
 # Taskade webhook URL
 WEBHOOK_URL = "https://www.taskade.com/api/v1/flows/01KD8638JJBXA7AP6CYS7YD25B/webhook"
 
+# Batching settings - the flow receives {"memories": [...]} per post
+BATCH_SIZE = 50  # Memories per post to start with
+MAX_BATCH_SIZE = 100  # Cap when growing the batch after successful posts
+
+# Webhook payload fields, in the order PAYLOAD_COLUMNS returns them
+PAYLOAD_KEYS = (
+    'memoryContent', 'memoryType', 'importance', 'confidence',
+    'supportCount', 'status', 'isProtected', 'source'
+)
+
+# The one definition of the payload shape. Casts and defaults happen in SQL
+# so rows already match the payload; the aliases double as the CSV header
+# for the bulk import. export_all.py selects these alongside its raw columns.
+PAYLOAD_COLUMNS = """
+    content AS "memoryContent",
+    COALESCE(lower(NULLIF(type, '')), 'fact') AS "memoryType",
+    importance AS "importance",
+    COALESCE(confidence, 0)::float8 AS "confidence",
+    support_count AS "supportCount",
+    COALESCE(lower(NULLIF(status, '')), 'active') AS "status",
+    CASE WHEN is_protected THEN 'yes' ELSE 'no' END AS "isProtected",
+    COALESCE(NULLIF(source, ''), 'postgresql_export') AS "source"
+"""
+
+EXPORT_QUERY = f"""
+    SELECT {PAYLOAD_COLUMNS}
+    FROM memory_entries
+    WHERE status = 'ACTIVE'
+    ORDER BY importance DESC, created_at DESC
+"""
+
+# Optional bulk-import endpoint taking every memory as one gzipped CSV upload.
+# When unset, or if the endpoint is unreachable or missing, the export falls
+# back to webhook batches
+BULK_IMPORT_URL = os.getenv('TASKADE_BULK_IMPORT_URL')
+# Responses meaning the endpoint doesn't exist, so nothing was imported
+BULK_UNAVAILABLE_STATUSES = (404, 405, 501)
+
 # Rate limiting settings
-BATCH_SIZE = 1  # Send 1 memory at a time
-DELAY_BETWEEN_BATCHES = 5  # Wait 5 seconds between memories
-DELAY_ON_ERROR = 120  # Wait 120 seconds if rate limited
-
-def get_connection():
-    """Establish database connection using URL or config"""
-    if DATABASE_URL:
-        return psycopg2.connect(DATABASE_URL)
-    return psycopg2.connect(**DB_CONFIG)
-
-def send_memory(memory_data, retry_count=0):
-    """Send a single memory to Taskade with retry logic"""
+MAX_WORKERS = 4  # Concurrent webhook posts in flight
+RATE_LIMIT = 12  # Max posts per RATE_PERIOD - the 1 post / 5s pace the old export ran at
+RATE_PERIOD = 60  # Seconds
+RATE_BURST = 1  # Posts allowed back-to-back before pacing kicks in
+MAX_RETRIES = 3  # Retries on 429 (honouring Retry-After) and refused connections
+DELAY_ON_ERROR = 120  # Seconds to wait after a 429 that has no Retry-After header
+PREFETCH_ROWS = 2000  # Rows read ahead of the uploader while posts are in flight
+
+class TokenBucket:
+    """Thread-safe token bucket so concurrent posts stay under the rate limit"""
+    def __init__(self, rate, period, burst=1):
+        # Small capacity and a bucket that starts at the burst size, so a run
+        # can't open with a full period's worth of posts in one go
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.fill_rate = rate / period
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.fill_rate
+            time.sleep(delay)
+
+rate_limiter = TokenBucket(RATE_LIMIT, RATE_PERIOD, RATE_BURST)
+
+def to_payload(row):
+    """Map a row of PAYLOAD_COLUMNS onto the webhook payload dict"""
+    return dict(zip(PAYLOAD_KEYS, row))
+
+def prefetch(rows, maxsize=PREFETCH_ROWS):
+    """Read rows on a background thread so DB fetches overlap with webhook posts"""
+    buffer = queue.Queue(maxsize=maxsize)
+    done = object()
+    error = []
+    
+    def reader():
+        try:
+            for row in rows:
+                buffer.put(row)
+        except Exception as e:
+            error.append(e)
+        finally:
+            buffer.put(done)
+    
+    threading.Thread(target=reader, daemon=True).start()
+    while (row := buffer.get()) is not done:
+        yield row
+    if error:
+        raise error[0]
+
+def create_session():
+    """Create a keep-alive HTTP session with pooled connections and retries"""
+    session = requests.Session()
+    # The webhook POST isn't idempotent: a read timeout or a 5xx may arrive
+    # after the flow already took the batch, and replaying it creates
+    # duplicates. The adapter only retries when the request never reached
+    # Taskade (connect errors); 429s are handled in send_batch so the wait
+    # is long enough and every attempt goes through the rate limiter.
+    retry = Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=0,
+        other=0,
+        status=0,
+        backoff_factor=2,
+        allowed_methods=frozenset(['POST'])
+    )
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry)
+    session.mount('https://', adapter)
+    return session
+
+def retry_after(response):
+    """Seconds Taskade asked us to wait after a 429, defaulting to DELAY_ON_ERROR"""
     try:
-        response = requests.post(
-            WEBHOOK_URL,
-            json=memory_data,
-            timeout=15
-        )
+        return max(0.0, float(response.headers['Retry-After']))
+    except (KeyError, ValueError):
+        # Missing, or an HTTP date rather than seconds
+        return DELAY_ON_ERROR
+
+def send_batch(session, batch):
+    """Send a batch of memories to Taskade as one payload, returning the HTTP status"""
+    body = dumps({"memories": batch})
+    try:
+        for attempt in range(MAX_RETRIES + 1):
+            rate_limiter.acquire()
+            response = session.post(
+                WEBHOOK_URL,
+                data=body,
+                headers={'Content-Type': 'application/json'},
+                timeout=15
+            )
+            
+            if response.status_code != 429 or attempt == MAX_RETRIES:
+                break
+            delay = retry_after(response)
+            tqdm.write(f"⏸️  Rate limited. Waiting {delay:.0f}s before retry {attempt + 1}/{MAX_RETRIES}...")
+            time.sleep(delay)
         
-        if response.status_code == 200:
-            return True
-        elif response.status_code == 429:
-            # Rate limited - wait and retry
-            if retry_count < 3:
-                print(f"⏸️  Rate limited. Waiting {DELAY_ON_ERROR}s before retry {retry_count + 1}/3...")
-                time.sleep(DELAY_ON_ERROR)
-                return send_memory(memory_data, retry_count + 1)
-            else:
-                print(f"❌ Failed after 3 retries: {memory_data['memoryContent'][:50]}")
-                return False
-        else:
-            print(f"⚠️  HTTP {response.status_code}: {memory_data['memoryContent'][:50]}")
-            return False
+        if response.status_code not in (200, 429):
+            tqdm.write(f"⚠️  HTTP {response.status_code} for {len(batch)} memories: {batch[0]['memoryContent'][:50]}")
+        return response.status_code
             
     except requests.exceptions.RequestException as e:
-        print(f"❌ Network error: {e}")
-        return False
+        tqdm.write(f"❌ Network error: {e}")
+        return None
+
+def bulk_upload(conn):
+    """Upload every memory as one gzipped CSV, returning (success, failed) or None if unavailable"""
+    buffer = io.BytesIO()
+    with conn.cursor() as cursor:
+        with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=6) as gz:
+            cursor.copy_expert(f"COPY ({EXPORT_QUERY}) TO STDOUT WITH CSV HEADER", gz)
+        count = cursor.rowcount
+    buffer.seek(0)
+    
+    # Only fall back to the webhook when Taskade can't have imported anything.
+    # A timeout or 5xx may land after the import ran, so replaying the upload
+    # - or sending the same memories again as batches - would duplicate them.
+    # For the same reason the upload goes through a session without retries.
+    with requests.Session() as session:
+        session.mount('https://', HTTPAdapter(max_retries=0))
+        try:
+            response = session.post(
+                BULK_IMPORT_URL,
+                files={'file': ('memories.csv.gz', buffer, 'application/gzip')},
+                timeout=120
+            )
+        except requests.exceptions.ConnectionError as e:
+            # Includes ConnectTimeout; ReadTimeout is not a ConnectionError
+            print(f"❌ Bulk import unreachable: {e}")
+            return None
+        except requests.exceptions.RequestException as e:
+            print(f"❌ Bulk import failed, not retrying to avoid duplicates: {e}")
+            return 0, count
+    
+    if response.status_code in BULK_UNAVAILABLE_STATUSES:
+        print(f"⚠️  Bulk import returned HTTP {response.status_code}")
+        return None
+    if not response.ok:
+        print(f"❌ Bulk import returned HTTP {response.status_code}, not retrying to avoid duplicates")
+        return 0, count
+    return count, 0
+
+def upload_memories(session, memories, total):
+    """Post memories in adaptive batches, halving the batch size on 429 and doubling it on success"""
+    source = iter(memories)
+    requeued = deque()
+    batch_size = BATCH_SIZE
+    # Growth never goes back above a size that was rate limited
+    size_ceiling = MAX_BATCH_SIZE
+    # No new posts go out until this time after a 429
+    paused_until = 0.0
+    success_count = 0
+    fail_count = 0
+    in_flight = {}
+    
+    def next_batch():
+        batch = []
+        while requeued and len(batch) < batch_size:
+            batch.append(requeued.popleft())
+        batch.extend(itertools.islice(source, batch_size - len(batch)))
+        return batch
+    
+    # Bounded refresh rate - per-batch prints were a console write (and a
+    # UTF-8 transcode on Windows) for every post
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor, \
+            tqdm(total=total, unit='mem', miniters=10, mininterval=0.5) as progress:
+        while True:
+            pause = paused_until - time.monotonic()
+            while pause <= 0 and len(in_flight) < MAX_WORKERS:
+                batch = next_batch()
+                if not batch:
+                    break
+                in_flight[executor.submit(send_batch, session, batch)] = batch
+            
+            if not in_flight:
+                if pause > 0:
+                    time.sleep(pause)
+                    continue
+                break
+            
+            # While paused, wake up when the pause ends even if nothing finished
+            done, _ = wait(in_flight, timeout=pause if pause > 0 else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch = in_flight.pop(future)
+                status = future.result()
+                
+                if status == 200:
+                    success_count += len(batch)
+                    progress.update(len(batch))
+                    batch_size = min(batch_size * 2, size_ceiling)
+                elif status == 429 and len(batch) > 1:
+                    # Still rate limited after retries - back off, shrink and
+                    # try these again. An older, larger batch coming back late
+                    # must not grow the size that was already cut.
+                    batch_size = min(batch_size, max(1, len(batch) // 2))
+                    size_ceiling = min(size_ceiling, batch_size)
+                    paused_until = time.monotonic() + DELAY_ON_ERROR
+                    progress.write(f"⏸️  Rate limited. Pausing {DELAY_ON_ERROR}s, then requeueing {len(batch)} memories in batches of {batch_size}...")
+                    requeued.extendleft(reversed(batch))
+                else:
+                    fail_count += len(batch)
+                    progress.update(len(batch))
+                    if status == 429:
+                        progress.write(f"❌ Still rate limited after {MAX_RETRIES} retries: {batch[0]['memoryContent'][:50]}")
+    
+    return success_count, fail_count
 
 def export_memories():
     """Main export loop with batching and rate limiting"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # Get total count
-        cursor.execute("SELECT COUNT(*) FROM memory_entries WHERE status = 'ACTIVE'")
-        total = cursor.fetchone()[0]
-        print(f"📊 Total memories to export: {total}")
-        
-        # Fetch all memories
-        cursor.execute("""
-            SELECT content, type, importance, confidence, 
-                   support_count, status, is_protected, source
-            FROM memory_entries
-            WHERE status = 'ACTIVE'
-            ORDER BY importance DESC, created_at DESC
-        """)
-        
-        memories = cursor.fetchall()
-        success_count = 0
-        fail_count = 0
-        batch_count = 0
-        
-        print(f"\n🚀 Starting export with {BATCH_SIZE} memories per batch, {DELAY_BETWEEN_BATCHES}s delay\n")
-        
-        for i, row in enumerate(memories, 1):
-            memory_data = {
-                "memoryContent": row[0],
-                "memoryType": row[1].lower() if row[1] else "fact",
-                "importance": row[2],
-                "confidence": float(row[3]) if row[3] is not None else 0.0,
-                "supportCount": row[4],
-                "status": row[5].lower() if row[5] else "active",
-                "isProtected": "yes" if row[6] else "no",
-                "source": row[7] or "postgresql_export"
-            }
+        with get_conn() as conn, conn:
+            # Count first so progress has a total before any row is fetched
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) FROM memory_entries WHERE status = 'ACTIVE'")
+                total = cursor.fetchone()[0]
+            print(f"📊 Total memories to export: {total}")
             
-            # Send the memory
-            if send_memory(memory_data):
-                success_count += 1
-                print(f"✅ {i}/{total} | {memory_data['memoryContent'][:60]}...")
-            else:
-                fail_count += 1
-            
-            # Batch delay logic
-            if i % BATCH_SIZE == 0 and i < total:
-                batch_count += 1
-                print(f"\n⏸️  Batch {batch_count} complete. Waiting {DELAY_BETWEEN_BATCHES}s...\n")
-                time.sleep(DELAY_BETWEEN_BATCHES)
+            with create_session() as session:
+                result = None
+                if BULK_IMPORT_URL:
+                    print(f"\n📦 Uploading all memories as one gzipped CSV to the bulk import endpoint...")
+                    result = bulk_upload(conn)
+                    if result is None:
+                        print(f"↩️  Bulk import unavailable - falling back to webhook batches")
+                
+                if result is None:
+                    print(f"\n🚀 Starting export in batches of up to {MAX_BATCH_SIZE} memories, {MAX_WORKERS} workers, max {RATE_LIMIT} posts per {RATE_PERIOD}s\n")
+                    
+                    # Stream memories through a server-side cursor into the uploader
+                    with conn.cursor(name='taskadeexport') as cursor:
+                        cursor.itersize = 1000
+                        cursor.execute(EXPORT_QUERY)
+                        payloads = (to_payload(row) for row in prefetch(cursor))
+                        result = upload_memories(session, payloads, total)
+                
+                success_count, fail_count = result
         
         # Final summary
         print(f"\n{'='*60}")
@@ -135,10 +333,6 @@ def export_memories():
         print(f"✅ Successful: {success_count}")
         print(f"❌ Failed: {fail_count}")
         print(f"📊 Total: {total}")
-        print(f"⏱️  Total batches: {batch_count + 1 if total > 0 else 0}")
-        
-        cursor.close()
-        conn.close()
         
         if fail_count == 0 and total > 0:
             print("\n🎉 All memories exported successfully!")
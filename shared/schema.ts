@@ -59,7 +59,10 @@ export const conversations = pgTable("conversations", {
     }
   }>(),
   createdAt: timestamp("created_at").default(sql`now()`),
-});
+}, (table) => ({
+  // Recent-conversation lookups filter and sort on created_at
+  createdAtIndex: index("conversations_created_at_idx").on(table.createdAt.desc()),
+}));
 
 export const messages = pgTable("messages", {
   id: varchar("id").primaryKey().default(sql`gen_random_uuid()`),
@@ -174,6 +177,8 @@ export const memoryEntries = pgTable("memory_entries", {
   uniqueCanonicalKey: uniqueIndex("unique_profile_canonical_key_idx").on(table.profileId, table.canonicalKey, table.lane),
   // Vector similarity search index
   embeddingIndex: index("memory_embedding_idx").using("hnsw", table.embedding.op("vector_cosine_ops")),
+  // Ordered scan of active memories for the export scripts (no Sort node)
+  activeExportIndex: index("memory_entries_active_export_idx").on(table.importance.desc(), table.createdAt.desc()).where(sql`${table.status} = 'ACTIVE'`),
 }));
 
 // === NEW: Entity Disambiguation System ===